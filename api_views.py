@@ -1,13 +1,20 @@
 # Use this file for your API viewsets only
 # E.g., from rest_framework import ...
-from django.db.models import Avg
-from rest_framework import viewsets, status
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Prefetch
+from rest_framework import serializers, viewsets, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
 
 from .models import Album, Song, Playlist, DottifyUser
-from .serializers import AlbumSerializer, SongSerializer, PlaylistSerializer
+from .renderers import RENDERER_CLASSES
+from .serializers import AlbumSerializer, SongSerializer, PlaylistSerializer, song_url_parts
+from .utils import STATISTICS_CACHE_KEY
 
 
 class AlbumViewSet(viewsets.ModelViewSet):
@@ -15,8 +22,15 @@ class AlbumViewSet(viewsets.ModelViewSet):
     ViewSet for Album CRUD operations.
     Supports list, create, retrieve, update, and delete.
     """
-    queryset = Album.objects.all()
+    # song_set is rendered via Song.__str__, so fetch just the columns it reads
+    queryset = Album.objects.prefetch_related(
+        Prefetch(
+            'song_set',
+            queryset=Song.objects.only('id', 'album_id', 'title', 'length', 'position').order_by('position', 'id'),
+        )
+    )
     serializer_class = AlbumSerializer
+    renderer_classes = RENDERER_CLASSES
 
 
 class SongViewSet(viewsets.ModelViewSet):
@@ -26,6 +40,7 @@ class SongViewSet(viewsets.ModelViewSet):
     """
     queryset = Song.objects.all()
     serializer_class = SongSerializer
+    renderer_classes = RENDERER_CLASSES
 
 
 class PlaylistViewSet(viewsets.ReadOnlyModelViewSet):
@@ -34,10 +49,51 @@ class PlaylistViewSet(viewsets.ReadOnlyModelViewSet):
     Only returns public playlists (visibility = 2).
     """
     serializer_class = PlaylistSerializer
+    renderer_classes = RENDERER_CLASSES
 
     def get_queryset(self):
-        # Only return public playlists
-        return Playlist.objects.filter(visibility=Playlist.Visibility.PUBLIC)
+        # Only return public playlists; song links only need the song IDs
+        return (
+            Playlist.objects.filter(visibility=Playlist.Visibility.PUBLIC)
+            .select_related('owner')
+            .only('id', 'name', 'created_at', 'visibility', 'owner__display_name')
+            .prefetch_related(Prefetch('songs', queryset=Song.objects.only('id')))
+        )
+
+    def list(self, request, *args, **kwargs):
+        """
+        List public playlists as plain dicts built from .values() rows,
+        bypassing PlaylistSerializer's per-field machinery.
+        Produces the same output as the serializer; retrieve() still uses it.
+        """
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None).values(
+            'id', 'name', 'created_at', 'visibility', 'owner__display_name'
+        )
+        page = self.paginate_queryset(queryset)
+        rows = list(queryset if page is None else page)
+
+        # One query for the songs of every listed playlist, in Song's default order
+        song_ids = {row['id']: [] for row in rows}
+        for playlist_id, song_id in Song.objects.filter(playlist__in=list(song_ids)).values_list('playlist', 'id'):
+            song_ids[playlist_id].append(song_id)
+
+        prefix, suffix = song_url_parts(request, self.format_kwarg)
+        created_at = serializers.DateTimeField()
+        data = [
+            {
+                'id': row['id'],
+                'name': row['name'],
+                'created_at': created_at.to_representation(row['created_at']),
+                'visibility': row['visibility'],
+                'owner': row['owner__display_name'],
+                'songs': [f"{prefix}{pk}{suffix}" for pk in song_ids[row['id']]],
+            }
+            for row in rows
+        ]
+
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
 
 
 class NestedSongViewSet(viewsets.ReadOnlyModelViewSet):
@@ -46,53 +102,70 @@ class NestedSongViewSet(viewsets.ReadOnlyModelViewSet):
     Routes: /api/albums/[album_id]/songs/ and /api/albums/[album_id]/songs/[song_id]/
     """
     serializer_class = SongSerializer
+    renderer_classes = RENDERER_CLASSES
 
     def get_queryset(self):
         # Get the album_pk from the URL
         album_pk = self.kwargs.get('album_pk')
-        # Return songs filtered by album
-        return Song.objects.filter(album_id=album_pk)
+        # Return songs filtered by album, fetching only the serialized columns
+        return Song.objects.filter(album_id=album_pk).only('id', 'title', 'length', 'album_id')
 
     def retrieve(self, request, pk=None, album_pk=None):
         """
         Get a specific song under an album.
         Returns 404 if the song doesn't belong to the album.
         """
-        # Get the song and verify it belongs to the album
-        song = get_object_or_404(Song, pk=pk, album_id=album_pk)
+        # get_queryset is already scoped to the album, so a mismatch is a 404
+        song = get_object_or_404(self.get_queryset(), pk=pk)
         serializer = self.get_serializer(song)
         return Response(serializer.data)
 
 
+STATISTICS_CACHE_TIMEOUT = 60
+
+
 class StatisticsAPIView(APIView):
     """
     API view for statistics endpoint.
     Returns counts and averages for various models.
+    Results are cached for a short time and invalidated by signals when the
+    counted models change. Responses carry an ETag so unchanged results can
+    be answered with 304 Not Modified.
     """
-    def get(self, request):
-        # Count users
-        user_count = DottifyUser.objects.count()
-
-        # Count albums
-        album_count = Album.objects.count()
-
-        # Count public playlists
-        playlist_count = Playlist.objects.filter(
-            visibility=Playlist.Visibility.PUBLIC
-        ).count()
+    renderer_classes = RENDERER_CLASSES
 
-        # Calculate average song length
-        # Returns None if no songs exist, so default to 0
-        song_length_avg = Song.objects.aggregate(
-            avg_length=Avg('length')
-        )['avg_length']
-
-        # Handle case where there are no songs
+    def get(self, request):
+        stats = cache.get_or_set(STATISTICS_CACHE_KEY, self.compute_statistics, STATISTICS_CACHE_TIMEOUT)
+        etag = '"%s"' % hashlib.md5(json.dumps(stats, sort_keys=True).encode()).hexdigest()
+
+        if etag in request.headers.get('If-None-Match', ''):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        return Response(stats, headers={'ETag': etag})
+
+    @staticmethod
+    def compute_statistics():
+        # Fetch every statistic in a single round-trip using scalar subqueries.
+        # Table and column names come from the models so the SQL follows them
+        qn = connection.ops.quote_name
+        visibility_column = Playlist._meta.get_field('visibility').column
+        length_column = Song._meta.get_field('length').column
+        sql = (
+            f"SELECT "
+            f"(SELECT COUNT(*) FROM {qn(DottifyUser._meta.db_table)}), "
+            f"(SELECT COUNT(*) FROM {qn(Album._meta.db_table)}), "
+            f"(SELECT COUNT(*) FROM {qn(Playlist._meta.db_table)} WHERE {qn(visibility_column)} = %s), "
+            f"(SELECT AVG({qn(length_column)}) FROM {qn(Song._meta.db_table)})"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [Playlist.Visibility.PUBLIC.value])
+            user_count, album_count, playlist_count, song_length_avg = cursor.fetchone()
+
+        # AVG returns NULL if no songs exist, so default to 0
         song_length_average = float(song_length_avg) if song_length_avg is not None else 0.0
 
-        return Response({
+        return {
             'user_count': user_count,
             'album_count': album_count,
             'playlist_count': playlist_count,
             'song_length_average': song_length_average
-        })
+        }
@@ -0,0 +1,20 @@
+from django.contrib.auth.models import Group
+from django.core.management.base import BaseCommand
+
+
+# Access is decided by membership of these groups, so they only need to exist
+GROUP_NAMES = ['Artist', 'DottifyAdmin']
+
+
+class Command(BaseCommand):
+    """
+    Create the Artist and DottifyAdmin groups.
+    Safe to run more than once.
+    """
+    help = 'Create the Dottify user groups.'
+
+    def handle(self, *args, **options):
+        for group_name in GROUP_NAMES:
+            _, created = Group.objects.get_or_create(name=group_name)
+            verb = 'Created' if created else 'Found existing'
+            self.stdout.write(f'{verb} group "{group_name}"')
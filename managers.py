@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.db import models
+from django.db.models import Avg, Q
+from django.utils import timezone
+
+RECENT_RATING_DAYS = 60
+
+
+class AlbumQuerySet(models.QuerySet):
+    def with_rating_stats(self):
+        """
+        Annotate each album with its all-time (avg_all) and recent (avg_recent)
+        average star rating, computed in the same query as the albums.
+        """
+        recent_cutoff = timezone.now() - timedelta(days=RECENT_RATING_DAYS)
+        return self.annotate(
+            avg_all=Avg("rating__stars"),
+            avg_recent=Avg("rating__stars", filter=Q(rating__created_at__gte=recent_cutoff)),
+        )
+
+    def streaming_with_songs(self, chunk_size=500):
+        """
+        Iterate albums with their songs in chunks of chunk_size, so batch jobs
+        over the whole catalogue use constant memory. Songs are prefetched
+        per chunk.
+        """
+        return self.prefetch_related("song_set").iterator(chunk_size=chunk_size)
@@ -1,10 +1,16 @@
+from datetime import timedelta
 from decimal import Decimal
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db import models
+from django.db.models import Max
 from django.template.defaultfilters import slugify
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from .managers import AlbumQuerySet
+from .utils import STATISTICS_CACHE_KEY
 # Import validators
 from .validators import validate_release_date_within_6_months, validate_stars_half_step
 
@@ -42,6 +48,17 @@ class Album(models.Model):
     release_date = models.DateField(validators=[validate_release_date_within_6_months])
     slug = models.SlugField(editable=False)
 
+    # Denormalized rating averages, kept current by Rating signals. The recent
+    # average also drifts as ratings age out of its window, so it is refreshed
+    # on read once older than RECENT_RATING_CACHE_TTL.
+    avg_rating_all_time = models.FloatField(null=True, blank=True, editable=False)
+    avg_rating_60d_cached = models.FloatField(null=True, blank=True, editable=False)
+    avg_rating_60d_updated_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    RECENT_RATING_CACHE_TTL = timedelta(hours=1)
+
+    objects = AlbumQuerySet.as_manager()
+
     class Meta:
         constraints = [
             models.UniqueConstraint(
@@ -50,9 +67,41 @@ class Album(models.Model):
             )
         ]
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # read via __dict__ so a deferred title isn't loaded just to track it
+        self._orig_title = self.__dict__.get("title")
+
     def save(self, *args, **kwargs):
-        self.slug = slugify(self.title or "")
+        if not self.slug or self.title != self._orig_title:
+            self.slug = slugify(self.title or "")
         super().save(*args, **kwargs)
+        self._orig_title = self.title
+
+    def refresh_rating_stats(self):
+        """Recompute the denormalized rating averages and store them."""
+        stats = Album.objects.with_rating_stats().filter(pk=self.pk).values("avg_all", "avg_recent").first() or {}
+        avg_all, avg_recent = stats.get("avg_all"), stats.get("avg_recent")
+        self.avg_rating_all_time = float(avg_all) if avg_all is not None else None
+        self.avg_rating_60d_cached = float(avg_recent) if avg_recent is not None else None
+        self.avg_rating_60d_updated_at = timezone.now()
+        # update() rather than save(): skips slug handling and post_save signals
+        Album.objects.filter(pk=self.pk).update(
+            avg_rating_all_time=self.avg_rating_all_time,
+            avg_rating_60d_cached=self.avg_rating_60d_cached,
+            avg_rating_60d_updated_at=self.avg_rating_60d_updated_at,
+        )
+
+    def get_rating_stats(self):
+        """
+        Return the (all-time, recent) average ratings, either may be None.
+        Reads the denormalized columns, refreshing them first if the recent
+        average is stale.
+        """
+        updated_at = self.avg_rating_60d_updated_at
+        if updated_at is None or timezone.now() - updated_at > self.RECENT_RATING_CACHE_TTL:
+            self.refresh_rating_stats()
+        return self.avg_rating_all_time, self.avg_rating_60d_cached
 
     def __str__(self):
         return self.title
@@ -69,19 +118,43 @@ class Song(models.Model):
             models.UniqueConstraint(fields=["title", "album"], name="unique_song_title_per_album"),
         ]
         ordering = ["position", "id"]
+        indexes = [
+            models.Index(fields=["album", "position"], name="song_album_position_idx"),
+        ]
+
+    @staticmethod
+    def _last_position(album_id):
+        return Song.objects.filter(album_id=album_id).aggregate(m=Max("position"))["m"]
 
     def save(self, *args, **kwargs):
         creating = self.pk is None
         if creating and self.position is None:
-            last_pos = (
-                Song.objects.filter(album=self.album)
-                .order_by("-position")
-                .values_list("position", flat=True)
-                .first()
-            )
+            # album_id avoids lazy-loading the related Album just to filter on it
+            last_pos = self._last_position(self.album_id)
             self.position = (last_pos or 0) + 1
         super().save(*args, **kwargs)
 
+    @classmethod
+    def bulk_create_for_album(cls, album, rows):
+        """
+        Create many songs on one album in a single INSERT.
+        Reads the current max position once and numbers the new rows after it,
+        since bulk_create bypasses save(). It also sends no post_save, so the
+        cached statistics are dropped here instead of by the signal handler.
+        """
+        next_pos = cls._last_position(album.pk) or 0
+        songs = []
+        for row in rows:
+            song = row if isinstance(row, cls) else cls(**row)
+            song.album = album
+            if song.position is None:
+                next_pos += 1
+                song.position = next_pos
+            songs.append(song)
+        created = cls.objects.bulk_create(songs)
+        cache.delete(STATISTICS_CACHE_KEY)
+        return created
+
     def __str__(self):
         pos = f"{self.position}. " if self.position else ""
         return f"{pos}{self.title} ({self.length}s)"
@@ -98,6 +171,13 @@ class Playlist(models.Model):
     visibility = models.IntegerField(choices=Visibility.choices, default=Visibility.HIDDEN)
     owner = models.ForeignKey(DottifyUser, on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [
+            # partial index: every visibility lookup in the app is for public playlists
+            # (Visibility.PUBLIC == 2; the enum isn't in scope inside Meta)
+            models.Index(fields=["visibility"], name="playlist_public_idx", condition=models.Q(visibility=2)),
+        ]
+
     def __str__(self):
         return f"{self.name} (owner: {self.owner})"
 
@@ -108,6 +188,20 @@ class Rating(models.Model):
     album = models.ForeignKey(Album, on_delete=models.CASCADE, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["album", "created_at"], name="rating_album_created_idx"),
+        ]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # the album as last loaded or saved, so a moved rating can refresh both albums
+        self._orig_album_id = self.__dict__.get("album_id")
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._orig_album_id = self.album_id
+
     def __str__(self):
         return f"{self.stars}★"
 
@@ -0,0 +1,44 @@
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to DRF's stdlib encoder
+    orjson = None
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson when it is installed.
+    Indented output (e.g. for the browsable API) and ASCII-only output are
+    left to the stdlib-based parent, as is everything if orjson is missing.
+    Data orjson rejects (TypeError) is also re-rendered by the parent.
+    One known difference: orjson writes NaN and infinity as null, where the
+    parent raises ValueError under STRICT_JSON (or writes NaN without it).
+    """
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            # Int dict keys become strings and UTC datetimes end in 'Z', as with the parent's encoder
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z,
+            )
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Match the parent: escape \u2028 and \u2029 so the output is a strict JavaScript subset
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+# The project's default renderers, with plain JSON swapped for ORJSONRenderer
+RENDERER_CLASSES = [
+    ORJSONRenderer if renderer is JSONRenderer else renderer
+    for renderer in api_settings.DEFAULT_RENDERER_CLASSES
+]
@@ -1,9 +1,59 @@
 # Write your API serialisers here.
+import copy
+
 from rest_framework import serializers
 from .models import Album, Song, Playlist, DottifyUser
+from .utils import detail_url_parts
+
+
+class CachedFieldsModelSerializer(serializers.ModelSerializer):
+    """
+    ModelSerializer that introspects the model fields once per class.
+    Each instance receives deep copies of the cached fields, so binding
+    (which sets field_name/parent) still happens per instance.
+    Only suitable for serializers whose fields don't depend on context.
+    """
+    _fields_cache = {}
+
+    def get_fields(self):
+        cls = type(self)
+        if cls not in self._fields_cache:
+            self._fields_cache[cls] = super().get_fields()
+        return copy.deepcopy(self._fields_cache[cls])
 
 
-class AlbumSerializer(serializers.ModelSerializer):
+def song_url_parts(request=None, format=None):
+    """
+    Split the song-detail URL around its pk, so links can be built with
+    string formatting instead of one reverse() call per song.
+    The reverse() result is cached per script prefix and format.
+    Returns (prefix, suffix); absolute if a request is given.
+    """
+    prefix, suffix = detail_url_parts('song-detail', format)
+    if request is not None:
+        prefix = request.build_absolute_uri(prefix)
+    return prefix, suffix
+
+
+class SongHyperlinkField(serializers.RelatedField):
+    """
+    Hyperlink to a song's detail view; declare it with read_only=True.
+    Resolves the URL once per field instance and formats every other song's
+    link from it, instead of calling reverse() for each related song.
+    Like HyperlinkedRelatedField, links follow the request's format suffix.
+    """
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._url_parts = None
+
+    def to_representation(self, value):
+        if self._url_parts is None:
+            self._url_parts = song_url_parts(self.context.get('request'), self.context.get('format'))
+        prefix, suffix = self._url_parts
+        return f"{prefix}{value.pk}{suffix}"
+
+
+class AlbumSerializer(CachedFieldsModelSerializer):
     """
     Serializer for Album model.
     - artist_account is excluded (not visible or settable via API)
@@ -27,29 +77,74 @@ class AlbumSerializer(serializers.ModelSerializer):
         read_only_fields = ['slug', 'song_set']
 
 
-class SongSerializer(serializers.ModelSerializer):
+class CachedAlbumPKField(serializers.PrimaryKeyRelatedField):
+    """
+    Album primary key field that can validate against albums preloaded into
+    the serializer context ('_albums_cache', a {pk: Album} dict) instead of
+    querying for every row. Without that context it behaves like
+    PrimaryKeyRelatedField.
+    """
+    CONTEXT_KEY = '_albums_cache'
+
+    @staticmethod
+    def _as_pk(value):
+        """
+        Return value as an Album pk, or None if it can't be one.
+        Converts with the pk field, as the uncached queryset lookup does, so
+        both paths accept the same inputs (e.g. 1, '1' and 1.0).
+        """
+        try:
+            return Album._meta.pk.get_prep_value(value)
+        except (TypeError, ValueError, OverflowError):
+            return None
+
+    @classmethod
+    def build_cache(cls, rows):
+        """
+        Load, in one query, the albums referenced by rows.
+        rows is unvalidated input: rows and album values of the wrong type
+        are skipped here and left for validation to report.
+        """
+        candidate_ids = {
+            cls._as_pk(row.get('album')) for row in rows if isinstance(row, dict)
+        }
+        candidate_ids.discard(None)
+        return Album.objects.in_bulk(candidate_ids)
+
+    def to_internal_value(self, data):
+        albums = self.context.get(self.CONTEXT_KEY)
+        if albums is None or self.pk_field is not None:
+            return super().to_internal_value(data)
+        pk = self._as_pk(data)
+        if pk is None:
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if pk not in albums:
+            self.fail('does_not_exist', pk_value=data)
+        return albums[pk]
+
+
+class SongSerializer(CachedFieldsModelSerializer):
     """
     Serializer for Song model.
     - position is excluded (not visible or settable via API)
-    - album is given as an ID
+    - album is given as an ID; pass CachedAlbumPKField.build_cache(rows) as
+      context['_albums_cache'] when validating many rows at once
     """
+    album = CachedAlbumPKField(queryset=Album.objects.all())
+
     class Meta:
         model = Song
         fields = ['id', 'title', 'length', 'album']
 
 
-class PlaylistSerializer(serializers.ModelSerializer):
+class PlaylistSerializer(CachedFieldsModelSerializer):
     """
     Serializer for Playlist model (read-only).
     - owner is returned as their display_name
     - songs are listed as hyperlinks (REST Level 3)
     """
     owner = serializers.CharField(source='owner.display_name', read_only=True)
-    songs = serializers.HyperlinkedRelatedField(
-        many=True,
-        read_only=True,
-        view_name='song-detail'
-    )
+    songs = SongHyperlinkField(many=True, read_only=True)
 
     class Meta:
         model = Playlist
@@ -0,0 +1,58 @@
+from threading import local
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Album, Song, Playlist, DottifyUser, Rating
+from .utils import HOME_PUBLIC_PLAYLISTS_CACHE_KEY, STATISTICS_CACHE_KEY
+
+
+@receiver([post_save, post_delete], sender=Album)
+@receiver([post_save, post_delete], sender=Song)
+@receiver([post_save, post_delete], sender=Playlist)
+@receiver([post_save, post_delete], sender=DottifyUser)
+def invalidate_statistics(sender, **kwargs):
+    """Drop the cached statistics whenever a counted model changes."""
+    cache.delete(STATISTICS_CACHE_KEY)
+
+
+@receiver([post_save, post_delete], sender=Playlist)
+@receiver([post_save, post_delete], sender=DottifyUser)
+@receiver(m2m_changed, sender=Playlist.songs.through)
+def invalidate_home_public_playlists(sender, **kwargs):
+    """Drop the cached public playlists when a playlist or its owner changes."""
+    cache.delete(HOME_PUBLIC_PLAYLISTS_CACHE_KEY)
+
+
+# Albums whose rating averages are due a refresh once the current transaction commits
+_pending_rating_refresh = local()
+
+
+def _refresh_pending_rating_stats():
+    """Refresh every album queued since the last run, once each."""
+    album_ids = _pending_rating_refresh.__dict__.pop('album_ids', set())
+    for album_id in album_ids:
+        Album(pk=album_id).refresh_rating_stats()
+
+
+@receiver([post_save, post_delete], sender=Rating)
+def refresh_album_rating_stats(sender, instance, **kwargs):
+    """
+    Recompute the album's denormalized averages when one of its ratings changes.
+    A rating moved to another album also refreshes the album it left.
+    Albums are queued and refreshed once on commit, so deleting many ratings
+    (e.g. a queryset delete) refreshes each album once, not once per rating.
+    """
+    # Ratings removed by their album's own deletion (album.delete() or a
+    # queryset delete of albums) have nothing left to update
+    origin = kwargs.get('origin')
+    if getattr(origin, 'model', type(origin)) is Album:
+        return
+    album_ids = {instance.album_id, instance._orig_album_id} - {None}
+    if not album_ids:
+        return
+    _pending_rating_refresh.__dict__.setdefault('album_ids', set()).update(album_ids)
+    # Every rating registers the hook; the first run drains the queue and the rest are no-ops
+    transaction.on_commit(_refresh_pending_rating_stats)
@@ -2,7 +2,16 @@ from rest_framework.test import APITestCase
 from rest_framework import status
 
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from datetime import datetime
 from .models import Album, Song, Playlist, DottifyUser
+from .renderers import ORJSONRenderer, orjson
+from .serializers import CachedAlbumPKField, PlaylistSerializer, SongSerializer
+from rest_framework.renderers import JSONRenderer
 
 class APITests(APITestCase):
     ''' Run tests for the API. Uses Django's ephemeral test database. '''
@@ -17,6 +26,8 @@ class APITests(APITestCase):
 
     def setUp(self):
         ''' Run the following before each test method. '''
+        # Cached statistics can outlive the rolled-back data of a previous test
+        cache.clear()
         a = Album.objects.create(
             title='Greatest Hits',
             format='SNGL',
@@ -94,3 +105,153 @@ class APITests(APITestCase):
     def test_statistics_api_view_exists(self):
         response = self.client.get(f'/api/statistics/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_album_list_api_prefetches_songs(self):
+        a2 = Album.objects.create(
+            title='More Hits',
+            artist_name='Johnny Singer',
+            release_date='2025-01-01',
+            retail_price='3.99',
+        )
+        Song.objects.create(title='Encore', album=a2, length=200)
+        # One query for albums, one for all of their songs
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/albums/')
+        self.assertEqual(len(response.json()), 2)
+
+    def test_statistics_api_values(self):
+        response = self.client.get('/api/statistics/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {
+            'user_count': 1,
+            'album_count': 1,
+            'playlist_count': 1,
+            'song_length_average': 410.5,
+        })
+
+    def test_statistics_api_not_modified_with_matching_etag(self):
+        response = self.client.get('/api/statistics/')
+        etag = response['ETag']
+        response = self.client.get('/api/statistics/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_statistics_api_cache_invalidated_on_change(self):
+        self.client.get('/api/statistics/')
+        Album.objects.create(
+            title='More Hits',
+            artist_name='Johnny Singer',
+            release_date='2025-01-01',
+            retail_price='3.99',
+        )
+        response = self.client.get('/api/statistics/')
+        self.assertEqual(response.json()['album_count'], 2)
+
+    def test_playlist_songs_are_hyperlinks(self):
+        Playlist.objects.get(pk=self.p_id).songs.add(self.s1_id, self.s2_id)
+        response = self.client.get(f'/api/playlists/{self.p_id}/')
+        expected = [
+            'http://testserver' + reverse('song-detail', kwargs={'pk': pk})
+            for pk in (self.s1_id, self.s2_id)
+        ]
+        self.assertEqual(response.json()['songs'], expected)
+
+    def test_playlist_song_hyperlinks_follow_format_suffix(self):
+        Playlist.objects.get(pk=self.p_id).songs.add(self.s1_id)
+        expected = ['http://testserver' + reverse('song-detail', kwargs={'pk': self.s1_id, 'format': 'json'})]
+        self.assertTrue(expected[0].endswith(f'/api/songs/{self.s1_id}.json'))
+        self.assertEqual(self.client.get(f'/api/playlists/{self.p_id}.json').json()['songs'], expected)
+        self.assertEqual(self.client.get('/api/playlists.json').json()[0]['songs'], expected)
+        self.assertTrue(PlaylistSerializer().fields['songs'].read_only)
+
+    def test_playlist_list_api_query_count(self):
+        Playlist.objects.get(pk=self.p_id).songs.add(self.s1_id, self.s2_id)
+        # One query for playlists joined to owners, one for their songs
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/playlists/')
+        self.assertEqual(response.json()[0]['owner'], 'AnnieMusicLover92')
+
+    def test_album_song_detail_api_404_for_other_album(self):
+        a2 = Album.objects.create(
+            title='More Hits',
+            artist_name='Johnny Singer',
+            release_date='2025-01-01',
+            retail_price='3.99',
+        )
+        response = self.client.get(f'/api/albums/{a2.id}/songs/{self.s1_id}/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_playlist_list_api_matches_detail_serializer(self):
+        Playlist.objects.get(pk=self.p_id).songs.add(self.s1_id, self.s2_id)
+        listed = self.client.get('/api/playlists/').json()[0]
+        detail = self.client.get(f'/api/playlists/{self.p_id}/').json()
+        self.assertEqual(listed, detail)
+
+    def test_orjson_renderer_matches_json_renderer(self):
+        data = {'name': 'Work Jams 2\u2028', 'songs': [1, 2], 'owner': None}
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_orjson_renderer_matches_json_renderer_edge_cases(self):
+        cases = [
+            # DRF's ListField/DictField errors are keyed by int index
+            {0: ['Not a valid string.'], 'name': {1: 'x'}},
+            {'created_at': timezone.now(), 'naive': datetime(2025, 1, 1, 12, 30)},
+            {'name': None, 'length': 1.5, 'songs': ()},
+        ]
+        for data in cases:
+            self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        # Documented difference: orjson writes non-finite floats as null
+        if orjson is not None:
+            self.assertEqual(ORJSONRenderer().render({'length': float('nan')}), b'{"length":null}')
+
+    def test_statistics_api_single_query(self):
+        with self.assertNumQueries(1):
+            self.client.get('/api/statistics/')
+        # A second request is answered from the cache
+        with self.assertNumQueries(0):
+            self.client.get('/api/statistics/')
+
+    def test_album_song_list_api_single_query(self):
+        with self.assertNumQueries(1):
+            self.client.get(f'/api/albums/{self.a_id}/songs/')
+
+    def test_song_serializer_validates_many_albums_with_one_query(self):
+        rows = [
+            {'title': 'Encore', 'length': 200, 'album': self.a_id},
+            {'title': 'Deep Cut', 'length': 300, 'album': self.a_id},
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            context = {CachedAlbumPKField.CONTEXT_KEY: CachedAlbumPKField.build_cache(rows)}
+            serializer = SongSerializer(data=rows, many=True, context=context)
+            self.assertTrue(serializer.is_valid())
+        # Only the cache lookup touches the album table; the rest are uniqueness checks
+        album_queries = [q for q in queries if f'FROM "{Album._meta.db_table}"' in q['sql']]
+        self.assertEqual(len(album_queries), 1)
+
+        rows = [{'title': 'Lost Track', 'length': 300, 'album': 99999}]
+        context = {CachedAlbumPKField.CONTEXT_KEY: CachedAlbumPKField.build_cache(rows)}
+        serializer = SongSerializer(data=rows[0], context=context)
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('album', serializer.errors)
+
+    def test_song_serializer_album_cache_gives_real_albums(self):
+        rows = [{'title': 'Encore', 'length': 200, 'album': str(self.a_id)}]
+        context = {CachedAlbumPKField.CONTEXT_KEY: CachedAlbumPKField.build_cache(rows)}
+        serializer = SongSerializer(data=rows, many=True, context=context)
+        self.assertTrue(serializer.is_valid())
+        song = serializer.save()[0]
+        self.assertEqual(song.album.title, 'Greatest Hits')
+        self.assertFalse(song.album._state.adding)
+
+        # The cached and uncached paths accept the same album values
+        for value in (self.a_id, str(self.a_id), float(self.a_id), 'abc', [self.a_id]):
+            row = {'title': f'Same {value}', 'length': 200, 'album': value}
+            cached = SongSerializer(data=row, context={
+                CachedAlbumPKField.CONTEXT_KEY: CachedAlbumPKField.build_cache([row])})
+            self.assertEqual(cached.is_valid(), SongSerializer(data=row).is_valid(), value)
+
+        # Malformed input is left for validation to reject, not a crash
+        rows = [{'title': 'A', 'length': 200, 'album': [self.a_id]}, 'junk', {'album': 'abc'}]
+        self.assertEqual(CachedAlbumPKField.build_cache(rows), {})
+        serializer = SongSerializer(data=rows, many=True,
+                                    context={CachedAlbumPKField.CONTEXT_KEY: {}})
+        self.assertFalse(serializer.is_valid())
@@ -1,6 +1,12 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
 from django.test import TestCase
 from django.contrib.auth.models import User
 from .models import Album, Song, Playlist, Comment, Rating, DottifyUser
+from .utils import STATISTICS_CACHE_KEY
+from .validators import validate_release_date_within_6_months, validate_stars_half_step
 
 class ModelTests(TestCase):
     def test_can_create_album(self):
@@ -59,3 +65,68 @@ class ModelTests(TestCase):
         p.delete()
         dottify_user.delete()
         u.delete()
+
+    def test_bulk_create_for_album_continues_positions(self):
+        a = Album.objects.create(
+            title='Greatest Hits',
+            artist_name='Johnny Singer',
+            release_date='2025-01-01',
+            retail_price='2.99',
+        )
+        Song.objects.create(title='One Hit Wonder', album=a, length=281)
+
+        Song.bulk_create_for_album(a, [
+            {'title': 'Another Bop', 'length': 540},
+            {'title': 'B-Side', 'length': 120},
+        ])
+
+        positions = list(a.song_set.values_list('title', 'position'))
+        assert positions == [('One Hit Wonder', 1), ('Another Bop', 2), ('B-Side', 3)]
+
+    def test_bulk_create_for_album_invalidates_statistics(self):
+        album = Album.objects.create(title='Bulk', artist_name='Various',
+                                     release_date='2025-01-01', retail_price='1.00')
+        cache.set(STATISTICS_CACHE_KEY, {'song_length_average': 0.0})
+        Song.bulk_create_for_album(album, [{'title': 'One', 'length': 120}])
+        assert cache.get(STATISTICS_CACHE_KEY) is None
+
+    def test_release_date_six_months_boundary(self):
+        validate_release_date_within_6_months(date.today() + timedelta(days=180))
+        with self.assertRaises(ValidationError):
+            validate_release_date_within_6_months(date.today() + timedelta(days=181))
+
+    def test_stars_half_step_validation(self):
+        for stars in ('0.0', '2.5', '5.0'):
+            validate_stars_half_step(Decimal(stars))
+        for stars in ('-0.5', '5.5', '3.2', '0.55'):
+            with self.assertRaises(ValidationError):
+                validate_stars_half_step(Decimal(stars))
+
+    def test_album_slug_follows_title_changes(self):
+        a = Album.objects.create(
+            title='Greatest Hits',
+            artist_name='Johnny Singer',
+            release_date='2025-01-01',
+            retail_price='2.99',
+        )
+        assert a.slug == 'greatest-hits'
+
+        a = Album.objects.get(pk=a.pk)
+        a.title = 'Greatest Hits Vol 2'
+        a.save()
+        assert Album.objects.get(pk=a.pk).slug == 'greatest-hits-vol-2'
+
+    def test_streaming_with_songs(self):
+        for title in ('Greatest Hits', 'More Hits'):
+            a = Album.objects.create(
+                title=title,
+                artist_name='Johnny Singer',
+                release_date='2025-01-01',
+                retail_price='2.99',
+            )
+            Song.objects.create(title='One Hit Wonder', album=a, length=281)
+
+        # One query for the albums, one for the songs of the (single) chunk
+        with self.assertNumQueries(2):
+            titles = [album.song_set.all()[0].title for album in Album.objects.streaming_with_songs()]
+        assert titles == ['One Hit Wonder', 'One Hit Wonder']
@@ -1,18 +1,26 @@
 from django.test import TestCase
-from django.contrib.auth.models import User
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 from django.template.defaultfilters import slugify
 from django.utils import timezone
 from datetime import timedelta
+from io import StringIO
 from decimal import Decimal
 from .models import Album, Song, Playlist, DottifyUser, Comment, Rating
+from .utils import detail_url
 
 class ViewTests(TestCase):
     ''' Run tests for the user-facing views (Sheets C and D). '''
 
     HTTP_ROUTE_FOUND = [200, 301, 302, 401, 403]
 
-    def setUp(self):
-        ''' Run the following before each test method. '''
+    @classmethod
+    def setUpTestData(cls):
+        ''' Create the shared fixtures once for the whole class. '''
         # Basic Setup
         a = Album.objects.create(
             title='Explosion!!!',
@@ -22,8 +30,11 @@ class ViewTests(TestCase):
             retail_price='2.99',
         )
 
-        s1 = Song.objects.create(title='Chunchunmaru', album=a, length=281)
-        s2 = Song.objects.create(title='Bakuretsu Magic', album=a, length=540)
+        # bulk_create skips Song.save(), so positions are assigned here
+        s1, s2 = Song.objects.bulk_create([
+            Song(title='Chunchunmaru', album=a, length=281, position=1),
+            Song(title='Bakuretsu Magic', album=a, length=540, position=2),
+        ])
 
         u = User.objects.create_user('megumin', 'megume@example.com', 'pw123')
         dottify_user = DottifyUser.objects.create(
@@ -40,29 +51,27 @@ class ViewTests(TestCase):
             owner=dottify_user
         )
 
-        # A recent rating
-        Rating.objects.create(
-            stars=Decimal('5.0'),
-            album=a
-            # created_at is auto_now_add
-        )
-
-        # An old rating
-        old_rating = Rating.objects.create(
-            stars=Decimal('1.0'),
-            album=a
+        # A recent rating and an old rating (created_at is auto_now_add)
+        _, old_rating = Rating.objects.bulk_create([
+            Rating(stars=Decimal('5.0'), album=a),
+            Rating(stars=Decimal('1.0'), album=a),
+        ])
+        # Manually set the date to be old, without re-saving the instance
+        Rating.objects.filter(pk=old_rating.pk).update(
+            created_at=timezone.now() - timedelta(days=70)
         )
-        # Manually set the date to be old
-        old_rating.created_at = timezone.now() - timedelta(days=70)
-        old_rating.save()
 
         # Record IDs
-        self.a_id = a.id
-        self.s1_id = s1.id
-        self.s2_id = s2.id
-        self.p_id = p.id
-        self.dottify_user_id = dottify_user.id
-        self.dottify_user = dottify_user
+        cls.a_id = a.id
+        cls.s1_id = s1.id
+        cls.s2_id = s2.id
+        cls.p_id = p.id
+        cls.dottify_user_id = dottify_user.id
+        cls.dottify_user = dottify_user
+
+    def setUp(self):
+        # Cached querysets can outlive the rolled-back data of a previous test
+        cache.clear()
 
     # --- Sheet C Tests ---
 
@@ -184,3 +193,164 @@ class ViewTests(TestCase):
         self.client.login(username='kazuma', password='pw123')
         response = self.client.post(f'/albums/{self.a_id}/delete/')
         self.assertEqual(response.status_code, 403)
+
+    def test_album_detail_query_count(self):
+        # The fixture ratings were bulk-created, so the first view fills in the cached averages
+        self.client.get(f'/albums/{self.a_id}/')
+        # One query for the album and its cached rating averages, one for its songs
+        with self.assertNumQueries(2):
+            self.client.get(f'/albums/{self.a_id}/')
+
+    def test_album_rating_cache_updated_by_new_rating(self):
+        # Averages are refreshed once the transaction commits
+        with self.captureOnCommitCallbacks(execute=True):
+            Rating.objects.create(stars=Decimal('4.0'), album_id=self.a_id)
+        album = Album.objects.get(pk=self.a_id)
+        self.assertAlmostEqual(album.avg_rating_all_time, 10 / 3)
+        self.assertEqual(album.avg_rating_60d_cached, 4.5)
+
+    def test_album_rating_cache_updated_when_rating_moves(self):
+        other = Album.objects.create(title='Megumin Remix', format='SNGL', artist_name='Megumin',
+                                     release_date='2025-01-01', retail_price='1.99')
+        with self.captureOnCommitCallbacks(execute=True):
+            moved = Rating.objects.create(stars=Decimal('4.0'), album_id=self.a_id)
+        moved.album = other
+        with self.captureOnCommitCallbacks(execute=True):
+            moved.save()
+        # The old album is back to its two fixture ratings
+        self.assertEqual(Album.objects.get(pk=self.a_id).avg_rating_all_time, 3.0)
+        self.assertEqual(Album.objects.get(pk=other.pk).avg_rating_all_time, 4.0)
+
+    def test_bulk_rating_deletes_refresh_each_album_once(self):
+        Rating.objects.bulk_create([Rating(stars=Decimal('3.0'), album_id=self.a_id) for _ in range(20)])
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                Album.objects.get(pk=self.a_id).rating_set.all().delete()
+        album_updates = [q for q in queries if q['sql'].startswith(f'UPDATE "{Album._meta.db_table}"')]
+        self.assertEqual(len(album_updates), 1)
+        self.assertIsNone(Album.objects.get(pk=self.a_id).avg_rating_all_time)
+
+        # Deleting albums through a queryset skips the ratings it cascades to
+        Rating.objects.bulk_create([Rating(stars=Decimal('3.0'), album_id=self.a_id) for _ in range(20)])
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                Album.objects.filter(pk=self.a_id).delete()
+        self.assertEqual(callbacks, [])
+        self.assertFalse(any(q['sql'].startswith('UPDATE') for q in queries))
+
+    def test_home_view_artist_group_checked_once(self):
+        u = User.objects.create_user('wiz', 'wiz@example.com', 'pw123')
+        u.groups.add(Group.objects.create(name='Artist'))
+        artist = DottifyUser.objects.create(user=u, display_name='Wiz')
+        Album.objects.filter(pk=self.a_id).update(artist_account=artist)
+        self.client.login(username='wiz', password='pw123')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/')
+        self.assertContains(response, 'Explosion!!!')
+        group_queries = [q for q in queries if 'auth_group' in q['sql']]
+        self.assertEqual(len(group_queries), 1)
+
+    def test_home_view_context_by_role(self):
+        # Regular user: no albums, only their own playlists
+        self.client.login(username='megumin', password='pw123')
+        response = self.client.get('/')
+        self.assertEqual(response.context['albums'], [])
+        self.assertEqual([p.id for p in response.context['playlists']], [self.p_id])
+        self.assertNotIn('songs', response.context)
+
+        # Admin: all albums, playlists and songs
+        User.objects.get(username='megumin').groups.add(Group.objects.create(name='DottifyAdmin'))
+        response = self.client.get('/')
+        self.assertEqual([a.id for a in response.context['albums']], [self.a_id])
+        self.assertEqual(len(response.context['songs']), 2)
+
+    def test_detail_url_matches_reverse(self):
+        for name in ('album-detail', 'song-detail', 'playlist-detail'):
+            self.assertEqual(detail_url(name, 42), reverse(name, kwargs={'pk': 42}))
+
+    def test_home_public_playlists_cache_invalidated(self):
+        self.assertContains(self.client.get('/'), 'degen')
+        Playlist.objects.filter(pk=self.p_id).update(name='not yet seen')
+        # Still served from the cache: update() sends no signals
+        self.assertContains(self.client.get('/'), 'degen')
+
+        Playlist.objects.create(name='road trip', owner=self.dottify_user, visibility=2)
+        response = self.client.get('/')
+        self.assertContains(response, 'not yet seen')
+        self.assertContains(response, 'road trip')
+
+    def test_user_detail_404_for_non_existent_user(self):
+        response = self.client.get('/users/99999/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_user_detail_redirect_single_query(self):
+        with self.assertNumQueries(1):
+            self.client.get(f'/users/{self.dottify_user_id}/this-slug-is-wrong/')
+
+    def test_owner_permissions_on_album_and_song_views(self):
+        u = User.objects.create_user('wiz', 'wiz@example.com', 'pw123')
+        u.groups.add(Group.objects.create(name='Artist'))
+        artist = DottifyUser.objects.create(user=u, display_name='Wiz')
+        self.client.login(username='wiz', password='pw123')
+
+        # Not the owner yet
+        self.assertEqual(self.client.get(f'/albums/{self.a_id}/edit/').status_code, 403)
+        self.assertEqual(self.client.get(f'/songs/{self.s1_id}/delete/').status_code, 403)
+
+        Album.objects.filter(pk=self.a_id).update(artist_account=artist)
+        self.assertEqual(self.client.get(f'/albums/{self.a_id}/edit/').status_code, 200)
+        self.assertEqual(self.client.get(f'/songs/{self.s1_id}/delete/').status_code, 200)
+
+    def test_artist_cannot_add_song_to_other_album(self):
+        u = User.objects.create_user('wiz', 'wiz@example.com', 'pw123')
+        u.groups.add(Group.objects.create(name='Artist'))
+        self.client.login(username='wiz', password='pw123')
+        response = self.client.post('/songs/new/', {'title': 'Intruder', 'length': 100, 'album': self.a_id})
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Song.objects.filter(title='Intruder').exists())
+
+    def test_create_views_allow_groups_created_directly(self):
+        # Group membership alone grants access; bootstrap has not been run
+        u = User.objects.create_user('wiz', 'wiz@example.com', 'pw123')
+        u.groups.add(Group.objects.create(name='Artist'))
+        artist = DottifyUser.objects.create(user=u, display_name='Wiz')
+        Album.objects.filter(pk=self.a_id).update(artist_account=artist)
+        self.client.login(username='wiz', password='pw123')
+
+        response = self.client.post('/songs/new/', {'title': 'Encore', 'length': 100, 'album': self.a_id})
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(Song.objects.filter(title='Encore', album_id=self.a_id).exists())
+
+        User.objects.get(username='megumin').groups.add(Group.objects.create(name='DottifyAdmin'))
+        self.client.login(username='megumin', password='pw123')
+        response = self.client.post('/albums/new/', {
+            'title': 'Explosion Deluxe', 'artist_name': 'Megumin', 'retail_price': '9.99',
+            'format': 'DLUX', 'release_date': '2025-01-01',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(Album.objects.filter(title='Explosion Deluxe').exists())
+
+    def test_bootstrap_creates_groups(self):
+        call_command('bootstrap', stdout=StringIO())
+        # Running it again must not fail or duplicate anything
+        call_command('bootstrap', stdout=StringIO())
+        self.assertEqual(Group.objects.filter(name__in=['Artist', 'DottifyAdmin']).count(), 2)
+
+    def test_home_and_search_paginate_albums(self):
+        Album.objects.bulk_create([
+            Album(title=f'Explosion {i}', format='SNGL', artist_name='Megumin',
+                  release_date='2025-01-01', retail_price='2.99', slug=f'explosion-{i}')
+            for i in range(30)
+        ])
+        response = self.client.get('/')
+        self.assertEqual(len(response.context['albums']), 25)
+        self.assertContains(response, 'Total results found: 31')
+        response = self.client.get('/?page=2')
+        self.assertEqual(len(response.context['albums']), 6)
+
+        self.client.login(username='megumin', password='pw123')
+        response = self.client.get('/albums/search/?q=Explosion&page=2')
+        self.assertEqual(len(response.context['albums']), 6)
+        self.assertEqual(response.context['page_obj'].number, 2)
+        self.assertContains(response, 'Total results found: 31')
@@ -27,8 +27,8 @@ from .views import (
 
 urlpatterns = [
     # API routes
-    path('api/', include(router.urls)),
-    path('api/', include(albums_router.urls)),
+    # Both routers share one include, so 'api/' is only matched once
+    path('api/', include(router.urls + albums_router.urls)),
     path('api/statistics/', StatisticsAPIView.as_view(), name='statistics'),
 
     # HTML view routes
@@ -0,0 +1,35 @@
+from functools import lru_cache
+
+from django.urls import get_script_prefix, reverse
+
+
+# Low-level cache keys, shared by the views that fill them and the signal
+# handlers that invalidate them
+STATISTICS_CACHE_KEY = 'dottify:statistics'
+HOME_PUBLIC_PLAYLISTS_CACHE_KEY = 'dottify:home_public_playlists'
+
+
+@lru_cache
+def _detail_url_parts(view_name, script_prefix, format):
+    kwargs = {'pk': 0}
+    if format:
+        kwargs['format'] = format
+    url = reverse(view_name, kwargs=kwargs)
+    prefix, suffix = url.rsplit('/0', 1)
+    return prefix + '/', suffix
+
+
+def detail_url_parts(view_name, format=None):
+    """
+    Split the URL of a <pk> detail route around its pk, so URLs can be built
+    with string formatting instead of a reverse() call each time.
+    A format (e.g. 'json') selects the route's format-suffix variant.
+    The reverse() result is cached per view name, script prefix and format.
+    """
+    return _detail_url_parts(view_name, get_script_prefix(), format)
+
+
+def detail_url(view_name, pk):
+    """Equivalent to reverse(view_name, kwargs={'pk': pk}), using the cached parts."""
+    prefix, suffix = detail_url_parts(view_name)
+    return f"{prefix}{pk}{suffix}"
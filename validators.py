@@ -1,25 +1,32 @@
-from datetime import date, timedelta
+from datetime import date
 from decimal import Decimal
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 
+_SIX_MONTHS_DAYS = 180
+# allowed star ratings 0.0, 0.5, ..., 5.0, expressed in tenths
+_VALID_STAR_TENTHS = frozenset(range(0, 51, 5))
+
 def validate_release_date_within_6_months(value: date):
     """
     unreleased albums may have a release date up to six months in the future, inclusive
     """
     if value is None:
         return
-    six_months = timedelta(days=180)
-    if value > (date.today() + six_months):
+    # compare day ordinals rather than building a new date from a timedelta
+    if value.toordinal() - date.today().toordinal() > _SIX_MONTHS_DAYS:
         raise ValidationError(_("Release date cannot be more than 6 months in the future."))
 
 def validate_stars_half_step(value: Decimal):
     """
     have a 1 digit and 1 decimal-place value between 0 and 5, in increments of 0.5
     """
-    if value < Decimal("0.0") or value > Decimal("5.0"):
+    if value is None:
+        return
+    scaled = value * 10
+    if scaled < 0 or scaled > 50:
         raise ValidationError(_("Stars must be between 0.0 and 5.0."))
-    # check increments of 0.5
-    doubled = value * 2
-    if doubled != int(doubled):
+    # check increments of 0.5; int() truncates, so also require an exact tenths value
+    tenths = int(scaled)
+    if tenths != scaled or tenths not in _VALID_STAR_TENTHS:
         raise ValidationError(_("Stars must be in increments of 0.5 (e.g., 2.5, 3.0, 4.5)."))
@@ -4,17 +4,65 @@ from django.views.generic import ListView, DetailView, CreateView, UpdateView, D
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.urls import reverse_lazy, reverse
-from django.http import HttpResponseForbidden, HttpResponse
-from django.db.models import Q, Avg
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.urls import reverse_lazy
+from django.http import Http404, HttpResponseForbidden, HttpResponse
+from django.db.models import Q
 from django.template.defaultfilters import slugify
-from django.utils import timezone
-from datetime import timedelta
 
 from .forms import AlbumForm, SongForm
 from .models import Album, Song, Playlist, DottifyUser, Comment, Rating
+from .utils import HOME_PUBLIC_PLAYLISTS_CACHE_KEY, detail_url
 
 
+def _user_group_names(user):
+    """
+    Return the set of the user's group names.
+    Fetched with a single query and cached on the user for the rest of the request.
+    """
+    if not hasattr(user, '_cached_group_names'):
+        names = user.groups.values_list('name', flat=True) if user.is_authenticated else []
+        user._cached_group_names = set(names)
+    return user._cached_group_names
+
+
+def _get_dottify_user(request):
+    """
+    Return the DottifyUser profile for request.user, or None if there isn't one.
+    Looked up once and cached on the request.
+    """
+    if not hasattr(request, '_dottify_user'):
+        user = request.user
+        request._dottify_user = (
+            DottifyUser.objects.select_related('user').filter(user=user).first()
+            if user.is_authenticated else None
+        )
+    return request._dottify_user
+
+
+class GroupCacheMixin:
+    """Mixin that loads the user's group names once at the start of the request."""
+
+    def dispatch(self, request, *args, **kwargs):
+        _user_group_names(request.user)
+        return super().dispatch(request, *args, **kwargs)
+
+
+HOME_PUBLIC_PLAYLISTS_CACHE_TIMEOUT = 300
+
+
+def _public_playlists():
+    """
+    Public playlists with their owners, shared by every anonymous home page view.
+    Cached, and invalidated by signals when playlists or their owners change.
+    """
+    return cache.get_or_set(
+        HOME_PUBLIC_PLAYLISTS_CACHE_KEY,
+        lambda: list(Playlist.objects.filter(visibility=Playlist.Visibility.PUBLIC).select_related('owner')),
+        HOME_PUBLIC_PLAYLISTS_CACHE_TIMEOUT,
+    )
+
 
 class HomeView(ListView):
     """
@@ -28,75 +76,98 @@ class HomeView(ListView):
     """
     template_name = 'dottify/home.html'
     context_object_name = 'albums'
+    paginate_by = 25
 
-    def get_queryset(self):
-        user = self.request.user
+    def dispatch(self, request, *args, **kwargs):
+        # Work out the user's role once; both get_queryset and get_context_data branch on it
+        self._role = self._get_role(request.user)
+        return super().dispatch(request, *args, **kwargs)
 
+    @staticmethod
+    def _get_role(user):
         if not user.is_authenticated:
-            # Not logged in: show all albums
-            return Album.objects.all()
-
-        # Check if user is in DottifyAdmin group
-        if user.groups.filter(name='DottifyAdmin').exists():
-            # Admin sees all albums
-            return Album.objects.all()
-
-        # Check if user is in Artist group
-        if user.groups.filter(name='Artist').exists():
-            # Artist sees only their own albums
-            try:
-                dottify_user = DottifyUser.objects.get(user=user)
-                return Album.objects.filter(artist_account=dottify_user)
-            except DottifyUser.DoesNotExist:
-                return Album.objects.none()
-
-        # Regular logged-in user: no albums shown
-        return Album.objects.none()
+            return 'anon'
+        group_names = _user_group_names(user)
+        if 'DottifyAdmin' in group_names:
+            return 'admin'
+        if 'Artist' in group_names:
+            return 'artist'
+        return 'user'
+
+    def _own_albums(self):
+        dottify_user = _get_dottify_user(self.request)
+        if dottify_user is None:
+            return Album.objects.none()
+        return Album.objects.filter(artist_account=dottify_user)
+
+    def _own_playlists(self):
+        dottify_user = _get_dottify_user(self.request)
+        if dottify_user is None:
+            return Playlist.objects.none()
+        # The related manager sets playlist.owner to dottify_user without a join
+        return dottify_user.playlist_set.all()
+
+    def get_queryset(self):
+        albums_for_role = {
+            # Not logged in and admins see all albums
+            'anon': Album.objects.all,
+            'admin': Album.objects.all,
+            # Artists see only their own albums
+            'artist': self._own_albums,
+            # Regular logged-in users: no albums shown
+            'user': Album.objects.none,
+        }
+        # Albums have no default ordering; pages need a stable one
+        return albums_for_role[self._role]().order_by('pk')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        user = self.request.user
-        # Get the count from the queryset for albums
-        context['total_results'] = context['albums'].count()
+        # Only the current page of albums is fetched; evaluate it once here.
+        # The total comes from the paginator's (already run) COUNT query
+        context['albums'] = context['object_list'] = list(context['albums'])
+        context['total_results'] = context['paginator'].count
 
-        # Handle playlists
-        if not user.is_authenticated:
+        playlists_for_role = {
             # Not logged in: show public playlists
-            context['playlists'] = Playlist.objects.filter(visibility=Playlist.Visibility.PUBLIC)
-        elif user.groups.filter(name='DottifyAdmin').exists():
+            'anon': _public_playlists,
             # Admin sees all playlists
-            context['playlists'] = Playlist.objects.all()
-        else:
-            # Logged-in user: show only their own playlists
-            try:
-                dottify_user = DottifyUser.objects.get(user=user)
-                context['playlists'] = Playlist.objects.filter(owner=dottify_user)
-            except DottifyUser.DoesNotExist:
-                context['playlists'] = Playlist.objects.none()
-
-        # Handle songs (only for DottifyAdmin)
-        if user.is_authenticated and user.groups.filter(name='DottifyAdmin').exists():
-            context['songs'] = Song.objects.all()
+            'admin': lambda: Playlist.objects.select_related('owner'),
+            # Other logged-in users: show only their own playlists
+            'artist': self._own_playlists,
+            'user': self._own_playlists,
+        }
+        context['playlists'] = playlists_for_role[self._role]()
+
+        # Handle songs (only for DottifyAdmin); querysets are lazy, so other
+        # roles never run this query
+        if self._role == 'admin':
+            context['songs'] = Song.objects.select_related('album', 'album__artist_account')
 
         return context
 
 
+ALBUM_SEARCH_PAGE_SIZE = 25
+
 
 def album_search(request):
     """
     Search albums by title (case-insensitive).
     User must be logged in.
+    Results are shown ALBUM_SEARCH_PAGE_SIZE at a time (?page=N).
     """
     if not request.user.is_authenticated:
         return HttpResponse("You must be logged in to view this page.", status=401)
     query = request.GET.get('q', '')
-    albums = Album.objects.filter(title__icontains=query) if query else Album.objects.none()
-    total_results = albums.count()
+    matches = Album.objects.filter(title__icontains=query).order_by('pk') if query else Album.objects.none()
+    # Fetch one page of matches; the total comes from the paginator's COUNT query
+    paginator = Paginator(matches, ALBUM_SEARCH_PAGE_SIZE)
+    page_obj = paginator.get_page(request.GET.get('page'))
 
     return render(request, 'dottify/album_search.html', {
-        'albums': albums,
+        'albums': list(page_obj.object_list),
+        'page_obj': page_obj,
         'query': query,
-        'total_results': total_results
+        'total_results': paginator.count
     })
 
 
@@ -109,14 +180,17 @@ class AlbumDetailView(DetailView):
     template_name = 'dottify/album_detail.html'
     context_object_name = 'album'
 
+    def get_queryset(self):
+        # Songs are loaded alongside the album rather than from the template context
+        return Album.objects.prefetch_related('song_set')
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['songs'] = self.object.song_set.all()
-        all_time_avg = self.object.rating_set.aggregate(Avg('stars'))['stars__avg'] or 0.0
-
-        # Calculate recent average rating (last 60 days)
-        sixty_days_ago = timezone.now() - timedelta(days=60)
-        recent_avg = self.object.rating_set.filter(created_at__gte=sixty_days_ago).aggregate(Avg('stars'))['stars__avg'] or 0.0
+        # All-time and recent (last 60 days) averages, read from the album row
+        all_time_avg, recent_avg = self.object.get_rating_stats()
+        all_time_avg = all_time_avg or 0.0
+        recent_avg = recent_avg or 0.0
 
         # Add formatted strings to context
         context['all_time_rating'] = f"Average rating of all time: {all_time_avg:.1f}"
@@ -124,12 +198,12 @@ class AlbumDetailView(DetailView):
         return context
 
 
-class IsArtistOrAdminMixin(UserPassesTestMixin):
+class IsArtistOrAdminMixin(GroupCacheMixin, UserPassesTestMixin):
     """Mixin to check if user is in Artist or DottifyAdmin group."""
 
     def test_func(self):
         user = self.request.user
-        return user.groups.filter(name__in=['Artist', 'DottifyAdmin']).exists()
+        return bool(_user_group_names(user) & {'Artist', 'DottifyAdmin'})
 
 
 class AlbumCreateView(LoginRequiredMixin, IsArtistOrAdminMixin, CreateView):
@@ -147,7 +221,7 @@ class AlbumCreateView(LoginRequiredMixin, IsArtistOrAdminMixin, CreateView):
         return super().form_valid(form)
 
 
-class AlbumUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
+class AlbumUpdateView(LoginRequiredMixin, GroupCacheMixin, UserPassesTestMixin, UpdateView):
     """
     Update an album.
     User must be logged in and in Artist or DottifyAdmin group.
@@ -158,24 +232,18 @@ class AlbumUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
     template_name = 'dottify/album_form.html'
 
     def get_success_url(self):
-        return reverse('album-detail', kwargs={'pk': self.object.pk})
+        return detail_url('album-detail', self.object.pk)
 
     def test_func(self):
-        album = self.get_object()
         user = self.request.user
 
         # Check if user is admin
-        if user.groups.filter(name='DottifyAdmin').exists():
+        if 'DottifyAdmin' in _user_group_names(user):
             return True
 
         # Check if user is artist and owns the album
-        if user.groups.filter(name='Artist').exists():
-            try:
-                dottify_user = DottifyUser.objects.get(user=user)
-                if album.artist_account == dottify_user:
-                    return True
-            except DottifyUser.DoesNotExist:
-                pass
+        if 'Artist' in _user_group_names(user):
+            return Album.objects.filter(pk=self.kwargs['pk'], artist_account__user=user).exists()
 
         return False
 
@@ -184,7 +252,7 @@ class AlbumUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
         return super().form_valid(form)
 
 
-class AlbumDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
+class AlbumDeleteView(LoginRequiredMixin, GroupCacheMixin, UserPassesTestMixin, DeleteView):
     """
     Delete an album.
     User must be logged in and either:
@@ -196,22 +264,14 @@ class AlbumDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
     success_url = reverse_lazy('home')
 
     def test_func(self):
-        album = self.get_object()
         user = self.request.user
 
         # Check if user is admin
-        if user.groups.filter(name='DottifyAdmin').exists():
+        if 'DottifyAdmin' in _user_group_names(user):
             return True
 
         # Check if user is the album's artist
-        try:
-            dottify_user = DottifyUser.objects.get(user=user)
-            if album.artist_account == dottify_user:
-                return True
-        except DottifyUser.DoesNotExist:
-            pass
-
-        return False
+        return Album.objects.filter(pk=self.kwargs['pk'], artist_account__user=user).exists()
 
     def form_valid(self, form):
         messages.success(self.request, f'Album "{self.object.title}" deleted successfully!')
@@ -224,6 +284,9 @@ class SongDetailView(DetailView):
     template_name = 'dottify/song_detail.html'
     context_object_name = 'song'
 
+    def get_queryset(self):
+        return Song.objects.select_related('album')
+
 
 class SongCreateView(LoginRequiredMixin, IsArtistOrAdminMixin, CreateView):
     """
@@ -241,19 +304,15 @@ class SongCreateView(LoginRequiredMixin, IsArtistOrAdminMixin, CreateView):
         album = form.cleaned_data['album']
 
         # If user is Artist, check they own the album
-        if user.groups.filter(name='Artist').exists():
-            try:
-                dottify_user = DottifyUser.objects.get(user=user)
-                if album.artist_account != dottify_user:
-                    return HttpResponseForbidden("You can only add songs to your own albums.")
-            except DottifyUser.DoesNotExist:
-                return HttpResponseForbidden("You don't have a Dottify user account.")
+        if 'Artist' in _user_group_names(user):
+            if not Album.objects.filter(pk=album.pk, artist_account__user=user).exists():
+                return HttpResponseForbidden("You can only add songs to your own albums.")
 
         messages.success(self.request, f'Song "{form.instance.title}" created successfully!')
         return super().form_valid(form)
 
 
-class SongUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
+class SongUpdateView(LoginRequiredMixin, GroupCacheMixin, UserPassesTestMixin, UpdateView):
     """
     Update a song.
     User must be logged in and either:
@@ -265,32 +324,24 @@ class SongUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
     template_name = 'dottify/song_form.html'
 
     def get_success_url(self):
-        return reverse('song-detail', kwargs={'pk': self.object.pk})
+        return detail_url('song-detail', self.object.pk)
 
     def test_func(self):
-        song = self.get_object()
         user = self.request.user
 
         # Check if user is admin
-        if user.groups.filter(name='DottifyAdmin').exists():
+        if 'DottifyAdmin' in _user_group_names(user):
             return True
 
         # Check if user is the song's album's artist
-        try:
-            dottify_user = DottifyUser.objects.get(user=user)
-            if song.album.artist_account == dottify_user:
-                return True
-        except DottifyUser.DoesNotExist:
-            pass
-
-        return False
+        return Song.objects.filter(pk=self.kwargs['pk'], album__artist_account__user=user).exists()
 
     def form_valid(self, form):
         messages.success(self.request, f'Song "{form.instance.title}" updated successfully!')
         return super().form_valid(form)
 
 
-class SongDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
+class SongDeleteView(LoginRequiredMixin, GroupCacheMixin, UserPassesTestMixin, DeleteView):
     """
     Delete a song.
     User must be logged in and either:
@@ -302,22 +353,14 @@ class SongDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
     success_url = reverse_lazy('home')
 
     def test_func(self):
-        song = self.get_object()
         user = self.request.user
 
         # Check if user is admin
-        if user.groups.filter(name='DottifyAdmin').exists():
+        if 'DottifyAdmin' in _user_group_names(user):
             return True
 
         # Check if user is the song's album's artist
-        try:
-            dottify_user = DottifyUser.objects.get(user=user)
-            if song.album.artist_account == dottify_user:
-                return True
-        except DottifyUser.DoesNotExist:
-            pass
-
-        return False
+        return Song.objects.filter(pk=self.kwargs['pk'], album__artist_account__user=user).exists()
 
     def form_valid(self, form):
         messages.success(self.request, f'Song "{self.object.title}" deleted successfully!')
@@ -329,15 +372,21 @@ def user_detail(request, pk, slug=None):
     Display DottifyUser details with playlists.
     Handles slug validation and redirects to canonical URL if needed.
     """
-    dottify_user = get_object_or_404(DottifyUser, pk=pk)
-    correct_slug = slugify(dottify_user.display_name)
+    # Only the display name is needed to check the slug
+    display_name = DottifyUser.objects.filter(pk=pk).values_list('display_name', flat=True).first()
+    if display_name is None:
+        raise Http404("No DottifyUser matches the given query.")
+    correct_slug = slugify(display_name)
 
     # If slug is missing or incorrect, redirect to canonical URL
     if slug != correct_slug:
         return redirect('user-detail-slug', pk=pk, slug=correct_slug)
 
-    # Get user's playlists
-    playlists = Playlist.objects.filter(owner=dottify_user)
+    dottify_user = get_object_or_404(DottifyUser.objects.select_related('user'), pk=pk)
+
+    # Get user's playlists; the related manager sets each playlist.owner
+    # (and so owner.user) to dottify_user without further queries
+    playlists = dottify_user.playlist_set.all()
 
     return render(request, 'dottify/user_detail.html', {
         'dottify_user': dottify_user,
@@ -352,8 +401,12 @@ class PlaylistDetailView(DetailView):
     template_name = 'dottify/playlist_detail.html'
     context_object_name = 'playlist'
 
+    def get_queryset(self):
+        return Playlist.objects.select_related('owner')
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        # Get all comments for this playlist, pre-fetching the owner's display_name
-        context['comments'] = self.get_object().comment_set.select_related('owner').all()
+        # Get all comments for this playlist, joining each owner and their auth user.
+        # self.object is already set by DetailView, so don't fetch the playlist again.
+        context['comments'] = self.object.comment_set.select_related('owner', 'owner__user').all()
         return context